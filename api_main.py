@@ -0,0 +1,35 @@
+import asyncio
+import argparse
+from pathlib import Path
+
+from utils.helpers import resource_path, get_persistent_app_dir
+from services.api_service import ApiServer, servir
+
+def main():
+    parser = argparse.ArgumentParser(description="API local do App Multas (extração + termo).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="processos para PDF/termo")
+    parser.add_argument("--fila", type=int, default=8, help="máx. de requisições aguardando antes do 429")
+    args = parser.parse_args()
+
+    # mesmos caminhos do MainWindow
+    base_dir = Path(resource_path("."))
+    app_dir = get_persistent_app_dir(app_name="AppMultas")
+
+    server = ApiServer(
+        motoristas_csv=str(base_dir / "data" / "motoristas.csv"),
+        tipos_multa_csv=str(base_dir / "data" / "tipos_multa.csv"),
+        template_docx=str(base_dir / "templates" / "termo_multa_modelo.docx"),
+        log_csv_path=str(app_dir / "logs_multas.csv"),
+        layouts_path=str(app_dir / "layouts_notificacao.json"),
+        arquivo_dir=str(app_dir / "arquivo"),
+        app_dir=str(app_dir),  # cadastro importado no app vale sem reiniciar a API
+        max_workers=args.workers,
+        max_fila=args.fila,
+    )
+    print(f"API App Multas em http://{args.host}:{args.port}")
+    asyncio.run(servir(server, args.host, args.port))
+
+if __name__ == "__main__":
+    main()
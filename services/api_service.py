@@ -0,0 +1,442 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from urllib.parse import urlsplit, parse_qs, quote
+
+from services.pdf_service import extrair_campos_notificacao, codigo_pdf_para_cod_multa
+from services.multa_service import MultaService
+from services.doc_service import gerar_pdf_final
+from services.log_service import LogService
+from services.archive_service import ArquivoService
+from services.motorista_import_service import caminho_motoristas
+
+STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 422: "Unprocessable Entity", 429: "Too Many Requests",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+# =========================
+# Jobs (rodam no ProcessPool)
+# =========================
+_services: dict[tuple, tuple[tuple, MultaService]] = {}
+
+def _resolver_motoristas(motoristas_csv: str, app_dir: str | None) -> str:
+    # cadastro importado pelo app (APP_DIR/motoristas.csv) vale assim que existir
+    if not app_dir:
+        return motoristas_csv
+    return caminho_motoristas(app_dir, os.path.dirname(motoristas_csv))
+
+def _fonte(path: str):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+def _multa_service(motoristas_csv: str, tipos_multa_csv: str) -> MultaService:
+    # cada processo do pool carrega os CSVs uma vez; recarrega se algum mudar em disco
+    key = (motoristas_csv, tipos_multa_csv)
+    fontes = (_fonte(motoristas_csv), _fonte(tipos_multa_csv))
+    cached = _services.get(key)
+    if cached is None or cached[0] != fontes:
+        _services[key] = (fontes, MultaService(motoristas_csv, tipos_multa_csv))
+    return _services[key][1]
+
+def _aquecer() -> int:
+    return os.getpid()
+
+def _extrair_bytes(pdf_bytes: bytes, workdir: str, layouts_path: str | None) -> tuple[str, dict]:
+    pdf_path = os.path.join(workdir, "notificacao.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(pdf_bytes)
+    try:
+        return pdf_path, extrair_campos_notificacao(pdf_path, layouts_path=layouts_path)
+    except RuntimeError:
+        raise
+    except Exception as e:
+        # PDF corrompido/ilegível (pdfminer/pdfplumber): é erro do cliente, não do servidor
+        raise RuntimeError(f"Não consegui ler o PDF: {e}")
+
+def job_extrair(pdf_bytes: bytes, motoristas_csv: str, tipos_multa_csv: str, layouts_path: str | None = None,
+                app_dir: str | None = None) -> dict:
+    motoristas_csv = _resolver_motoristas(motoristas_csv, app_dir)
+    workdir = tempfile.mkdtemp(prefix="multas_api_")
+    try:
+        _, extracao = _extrair_bytes(pdf_bytes, workdir, layouts_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    cod_multa = codigo_pdf_para_cod_multa(extracao["codigo_4d"], extracao["desdobramento"])
+    multa = _multa_service(motoristas_csv, tipos_multa_csv).buscar_multa_por_cod(cod_multa)
+    return {"extracao": extracao, "cod_multa": cod_multa, "multa": multa}
+
+def job_mensagem(motoristas_csv: str, tipos_multa_csv: str, motorista: str, extracao: dict, cod_multa: str,
+                 app_dir: str | None = None) -> dict:
+    motoristas_csv = _resolver_motoristas(motoristas_csv, app_dir)
+    service = _multa_service(motoristas_csv, tipos_multa_csv)
+    multa = service.buscar_multa_por_cod(cod_multa)
+    return {"mensagem": service.gerar_mensagem(motorista, extracao, multa), "multa": multa}
+
+def job_termo(pdf_bytes: bytes, motoristas_csv: str, tipos_multa_csv: str, template_docx: str,
+              motorista: str, indicar: str, layouts_path: str | None = None,
+              arquivo_dir: str | None = None, app_dir: str | None = None) -> dict:
+    """
+    Gera o PDF final numa pasta temporária e devolve o caminho.
+    Quem chamou é responsável por apagar result["workdir"].
+    """
+    motoristas_csv = _resolver_motoristas(motoristas_csv, app_dir)
+    workdir = tempfile.mkdtemp(prefix="multas_api_")
+    try:
+        pdf_path, extracao = _extrair_bytes(pdf_bytes, workdir, layouts_path)
+        cod_multa = codigo_pdf_para_cod_multa(extracao["codigo_4d"], extracao["desdobramento"])
+        multa = _multa_service(motoristas_csv, tipos_multa_csv).buscar_multa_por_cod(cod_multa)
+
+        result = gerar_pdf_final(
+            motoristas_csv=motoristas_csv,
+            template_docx=template_docx,
+            pdf_notificacao=pdf_path,
+            extracao=extracao,
+            multa_atual=multa,
+            motorista_nome=motorista,
+            indicar=indicar,
+            output_dir=os.path.join(workdir, "out"),
+            arquivo=ArquivoService(arquivo_dir, comprimir=True) if arquivo_dir else None,
+            tipos_multa_csv=tipos_multa_csv,
+        )
+        result["workdir"] = workdir
+        return result
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+# =========================
+# HTTP
+# =========================
+class HttpError(Exception):
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+
+class ApiServer:
+    """
+    Serviço HTTP local (asyncio) para ERP/RH:
+      POST /extrair   corpo = PDF da notificação -> JSON com campos e multa
+      POST /mensagem  corpo = JSON {motorista, extracao, cod_multa?} -> JSON com mensagem
+      POST /termo?motorista=...&indicar=SIM|NÃO  corpo = PDF -> PDF final (stream)
+      GET  /metrics   latências por rota
+    Trabalho pesado vai para um ProcessPool: até max_workers jobs rodando e
+    max_fila aguardando; além disso responde 429.
+    """
+
+    def __init__(
+        self,
+        motoristas_csv: str,
+        tipos_multa_csv: str,
+        template_docx: str,
+        log_csv_path: str,
+        layouts_path: str | None = None,
+        arquivo_dir: str | None = None,
+        app_dir: str | None = None,
+        max_workers: int = 2,
+        max_fila: int = 8,
+        max_body: int = 20 * 1024 * 1024,
+    ):
+        self.motoristas_csv = motoristas_csv
+        self.tipos_multa_csv = tipos_multa_csv
+        self.template_docx = template_docx
+        self.layouts_path = layouts_path
+        self.arquivo_dir = arquivo_dir
+        self.app_dir = app_dir  # se tiver APP_DIR/motoristas.csv (importado no app), os jobs usam ele
+        self.log_service = LogService(log_csv_path)
+
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.max_body = max_body
+
+        self.pool: ProcessPoolExecutor | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self._pendentes = 0
+
+        self._latencias: dict[str, deque] = {}
+        self._status: dict[str, dict[int, int]] = {}
+
+        self.routes = {
+            ("POST", "/extrair"): self.handle_extrair,
+            ("POST", "/mensagem"): self.handle_mensagem,
+            ("POST", "/termo"): self.handle_termo,
+            ("GET", "/metrics"): self.handle_metrics,
+        }
+
+    def _novo_pool(self) -> ProcessPoolExecutor:
+        # "spawn": o worker não herda os sockets abertos do servidor/clientes
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def _aquecer_pool(self):
+        # sobe os workers antes de aceitar conexões
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _aquecer) for _ in range(self.max_workers)))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self.pool = self._novo_pool()
+        self._sem = asyncio.Semaphore(self.max_workers)
+        await self._aquecer_pool()
+        return await asyncio.start_server(self._handle_conn, host, port)
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    # ---------- pool com back-pressure
+    async def _run_job(self, fn, *args):
+        # _pendentes conta os que rodam (até max_workers) + os que aguardam
+        if self._pendentes >= self.max_workers + self.max_fila:
+            raise HttpError(429, "Fila cheia, tente novamente em instantes.")
+        self._pendentes += 1
+        try:
+            async with self._sem:
+                loop = asyncio.get_running_loop()
+                pool = self.pool
+                try:
+                    return await loop.run_in_executor(pool, fn, *args)
+                except BrokenExecutor:
+                    # worker morreu: troca o pool (uma vez só, mesmo com várias falhas juntas)
+                    if self.pool is pool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        self.pool = self._novo_pool()
+                    raise HttpError(503, "Worker de processamento caiu; tente novamente.")
+        finally:
+            self._pendentes -= 1
+
+    # ---------- parsing / resposta
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Linha de requisição inválida.")
+
+        headers = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = h.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+
+        try:
+            size = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Content-Length inválido.")
+        if size > self.max_body:
+            raise HttpError(413, f"Corpo maior que {self.max_body} bytes.")
+        body = await reader.readexactly(size) if size else b""
+
+        url = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes,
+                    content_type: str = "application/json; charset=utf-8", extra: dict | None = None):
+        head = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        for k, v in (extra or {}).items():
+            head.append(f"{k}: {v}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, data: dict, extra: dict | None = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, extra=extra)
+
+    async def _stream_file(self, writer: asyncio.StreamWriter, path: str, content_type: str, extra: dict):
+        head = [
+            "HTTP/1.1 200 OK",
+            f"Content-Type: {content_type}",
+            "Transfer-Encoding: chunked",
+            "Connection: close",
+        ]
+        for k, v in extra.items():
+            head.append(f"{k}: {v}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                writer.write(f"{len(chunk):X}\r\n".encode("latin-1") + chunk + b"\r\n")
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        t0 = time.perf_counter()
+        route = "?"
+        status = 500
+        medir = True
+        try:
+            try:
+                req = await self._read_request(reader)
+                if req is None:
+                    medir = False  # conexão fechada sem requisição
+                    return
+                method, path, query, headers, body = req
+                route = path
+
+                handler = self.routes.get((method, path))
+                if handler is None:
+                    if path in {p for _, p in self.routes}:
+                        raise HttpError(405, f"Método {method} não permitido em {path}.")
+                    raise HttpError(404, f"Rota não encontrada: {path}")
+
+                status = await handler(writer, query, headers, body)
+
+            except HttpError as e:
+                status = e.status
+                extra = {"Retry-After": "1"} if e.status in (429, 503) else None
+                await self._send_json(writer, e.status, {"erro": str(e)}, extra=extra)
+            except RuntimeError as e:
+                # erros de negócio (PDF ilegível, COD_MULTA/motorista inexistente)
+                status = 422
+                await self._send_json(writer, 422, {"erro": str(e)})
+            except Exception as e:
+                status = 500
+                await self._send_json(writer, 500, {"erro": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if medir:
+                self._registrar_metrica(route, status, time.perf_counter() - t0)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # ---------- métricas
+    def _registrar_metrica(self, route: str, status: int, segundos: float):
+        if route not in {p for _, p in self.routes}:
+            route = "outros"
+        self._latencias.setdefault(route, deque(maxlen=1000)).append(segundos)
+        por_status = self._status.setdefault(route, {})
+        por_status[status] = por_status.get(status, 0) + 1
+
+    def metricas(self) -> dict:
+        rotas = {}
+        for route, lat in self._latencias.items():
+            ordenado = sorted(lat)
+            n = len(ordenado)
+            rotas[route] = {
+                "requisicoes": sum(self._status.get(route, {}).values()),
+                "por_status": {str(k): v for k, v in sorted(self._status.get(route, {}).items())},
+                "latencia_ms": {
+                    "media": round(sum(ordenado) / n * 1000, 2),
+                    "p50": round(ordenado[int(n * 0.50)] * 1000, 2),
+                    "p95": round(ordenado[min(n - 1, int(n * 0.95))] * 1000, 2),
+                    "p99": round(ordenado[min(n - 1, int(n * 0.99))] * 1000, 2),
+                    "max": round(ordenado[-1] * 1000, 2),
+                },
+            }
+        return {"pendentes": self._pendentes, "max_fila": self.max_fila, "rotas": rotas}
+
+    # ---------- handlers
+    def _json_body(self, body: bytes) -> dict:
+        try:
+            data = json.loads(body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HttpError(400, "Corpo JSON inválido.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Corpo JSON precisa ser um objeto.")
+        return data
+
+    def _pdf_body(self, body: bytes) -> bytes:
+        if not body.startswith(b"%PDF"):
+            raise HttpError(400, "Corpo precisa ser um PDF.")
+        return body
+
+    async def handle_extrair(self, writer, query, headers, body) -> int:
+        result = await self._run_job(
+            job_extrair, self._pdf_body(body), self.motoristas_csv, self.tipos_multa_csv, self.layouts_path,
+            self.app_dir,
+        )
+        await self._send_json(writer, 200, result)
+        return 200
+
+    async def handle_mensagem(self, writer, query, headers, body) -> int:
+        data = self._json_body(body)
+        extracao = data.get("extracao")
+        motorista = data.get("motorista")
+        if not isinstance(extracao, dict) or not motorista:
+            raise HttpError(400, "Informe 'motorista' e 'extracao'.")
+
+        cod_multa = data.get("cod_multa")
+        if not cod_multa:
+            try:
+                cod_multa = codigo_pdf_para_cod_multa(extracao["codigo_4d"], extracao["desdobramento"])
+            except KeyError:
+                raise HttpError(400, "Informe 'cod_multa' ou codigo_4d/desdobramento na extracao.")
+
+        result = await self._run_job(
+            job_mensagem, self.motoristas_csv, self.tipos_multa_csv, motorista, extracao, cod_multa,
+            self.app_dir,
+        )
+        await self._send_json(writer, 200, result)
+        return 200
+
+    async def handle_termo(self, writer, query, headers, body) -> int:
+        motorista = query.get("motorista", "").strip()
+        indicar = query.get("indicar", "SIM").strip().upper()
+        if indicar == "NAO":
+            indicar = "NÃO"
+        if not motorista:
+            raise HttpError(400, "Informe ?motorista=...")
+        if indicar not in ("SIM", "NÃO"):
+            raise HttpError(400, "indicar precisa ser SIM ou NÃO.")
+
+        result = await self._run_job(
+            job_termo, self._pdf_body(body), self.motoristas_csv, self.tipos_multa_csv,
+            self.template_docx, motorista, indicar, self.layouts_path, self.arquivo_dir, self.app_dir,
+        )
+        try:
+            # registra log igual ao botão "Gerar PDF Final"
+            # pandas + sha256 da partição: fora da thread do event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.log_service.registrar, result["log_row"])
+            await self._stream_file(
+                writer, result["pdf_final_path"], "application/pdf",
+                {
+                    "X-Id-Registro": result["log_row"]["id_registro"],
+                    "Content-Disposition": "attachment; filename*=UTF-8''"
+                    + quote(os.path.basename(result["pdf_final_path"])),
+                },
+            )
+        finally:
+            shutil.rmtree(result["workdir"], ignore_errors=True)
+        return 200
+
+    async def handle_metrics(self, writer, query, headers, body) -> int:
+        await self._send_json(writer, 200, self.metricas())
+        return 200
+
+async def servir(server: ApiServer, host: str = "127.0.0.1", port: int = 8765):
+    srv = await server.start(host, port)
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        server.close()
@@ -0,0 +1,73 @@
+import os
+import zlib
+import tempfile
+
+from utils.helpers import sha256_arquivo
+
+class ArquivoService:
+    """
+    Arquivo endereçado por conteúdo: cada blob fica em
+    <base_dir>/objetos/<2 primeiros hex>/<sha256>[.z]
+    A chave é o SHA-256 do conteúdo original, então o mesmo PDF é guardado
+    uma vez só e achar um documento é só montar o caminho (sem busca).
+    comprimir: grava com zlib quando isso economiza pelo menos 5%.
+    """
+
+    def __init__(self, base_dir: str, comprimir: bool = False):
+        self.base_dir = base_dir
+        self.comprimir = comprimir
+        self.objetos_dir = os.path.join(base_dir, "objetos")
+        os.makedirs(self.objetos_dir, exist_ok=True)
+
+    def _dir(self, chave: str) -> str:
+        return os.path.join(self.objetos_dir, chave[:2])
+
+    def caminho(self, chave: str) -> str | None:
+        # blob pode estar cru ou comprimido; devolve o que existir
+        base = os.path.join(self._dir(chave), chave)
+        for p in (base, base + ".z"):
+            if os.path.exists(p):
+                return p
+        return None
+
+    def existe(self, chave: str) -> bool:
+        return bool(chave) and self.caminho(chave) is not None
+
+    def _gravar(self, chave: str, data: bytes):
+        if self.existe(chave):
+            return
+
+        sufixo = ""
+        if self.comprimir:
+            z = zlib.compress(data, 6)
+            if len(z) < len(data) * 0.95:
+                data, sufixo = z, ".z"
+
+        os.makedirs(self._dir(chave), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._dir(chave), prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, os.path.join(self._dir(chave), chave + sufixo))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def guardar_arquivo(self, path: str) -> str:
+        chave = sha256_arquivo(path)
+
+        # duplicado: nem relê o arquivo
+        if not self.existe(chave):
+            with open(path, "rb") as f:
+                self._gravar(chave, f.read())
+        return chave
+
+    def ler(self, chave: str) -> bytes:
+        p = self.caminho(chave)
+        if p is None:
+            raise RuntimeError(f"Documento não encontrado no arquivo: {chave}")
+        with open(p, "rb") as f:
+            data = f.read()
+        return zlib.decompress(data) if p.endswith(".z") else data
+
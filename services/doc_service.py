@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 import shutil
@@ -10,6 +11,7 @@ from docxtpl import DocxTemplate
 
 from utils.helpers import sanitize_filename, data_por_extenso_ptbr, format_brl
 from services.multa_service import MultaService
+from services.archive_service import ArquivoService
 
 def gerar_termo_docx(template_docx: str, context: dict, out_docx_path: str):
     doc = DocxTemplate(template_docx)
@@ -69,6 +71,37 @@ def merge_pdfs(pdf_paths: list[str], out_path: str):
         writer.write(f)
     return out_path
 
+def caminho_livre(output_dir: str, nome: str, id_registro: str) -> str:
+    """
+    Não sobrescreve PDF já existente na pasta: se o nome estiver ocupado,
+    usa "<nome> (<id_registro>).pdf" (e, se ainda assim existir, "-2", "-3"...).
+    """
+    path = os.path.join(output_dir, nome)
+    if not os.path.exists(path):
+        return path
+    base, ext = os.path.splitext(nome)
+    path = os.path.join(output_dir, f"{base} ({id_registro}){ext}")
+    n = 2
+    while os.path.exists(path):
+        path = os.path.join(output_dir, f"{base} ({id_registro}-{n}){ext}")
+        n += 1
+    return path
+
+def remontar_pdf_final(arquivo: ArquivoService, chave_termo: str, chave_notificacao: str, out_path: str):
+    """
+    Refaz o PDF final (Termo + Notificação) direto do arquivo, sem Word.
+    """
+    from pypdf import PdfWriter, PdfReader
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    writer = PdfWriter()
+    for chave in (chave_termo, chave_notificacao):
+        reader = PdfReader(io.BytesIO(arquivo.ler(chave)))
+        for page in reader.pages:
+            writer.add_page(page)
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    return out_path
+
 def gerar_pdf_final(
     motoristas_csv: str,
     template_docx: str,
@@ -77,29 +110,48 @@ def gerar_pdf_final(
     multa_atual: dict,
     motorista_nome: str,
     indicar: str,
-    output_dir: str
+    output_dir: str,
+    cache_dir: str | None = None,
+    arquivo: ArquivoService | None = None,
+    tipos_multa_csv: str | None = None,
+    registro: dict | None = None,
 ) -> dict:
     """
     - Gera termo preenchido (docx → pdf)
     - Mescla termo_pdf + pdf_notificacao => pdf_final
+    - Se tiver arquivo: guarda notificação e termo (por SHA-256) e põe as chaves no log
+    - tipos_multa_csv: se omitido, procura tipos_multa.csv na pasta do motoristas_csv
+    - registro: linha do log ao reabrir; id, data, motorista e valores vêm dela
+      (sem nova busca no cadastro nem novo id_registro)
     - Retorna {pdf_final_path, log_row}
     """
     if not os.path.exists(template_docx):
         raise FileNotFoundError(template_docx)
 
-    # precisa do motorista_id/telefone
-    # (reutiliza MultaService só para buscar motorista)
-    # - tipos_multa não precisa aqui; mas mantemos o padrão
-    tipos_dummy = os.path.join(os.path.dirname(motoristas_csv), "tipos_multa.csv")
-    service = MultaService(motoristas_csv, tipos_dummy)
-
-    motor = service.buscar_motorista(motorista_nome)
-
     valor_base_num = float(multa_atual["valor_base_num"])
-    v_com, v_sem = service.calcular_valores(valor_base_num)
 
-    now = datetime.now()
-    reg_id = now.strftime("%Y%m%d%H%M%S")
+    if registro is not None:
+        motor = {
+            "motorista_id": registro["motorista_id"],
+            "nome_motorista": registro["nome_motorista"],
+            "telefone": registro["telefone"],
+        }
+        v_com = float(registro["valor_com_indicacao"])
+        v_sem = float(registro["valor_sem_indicacao"])
+        now = datetime.strptime(registro["data_registro"], "%Y-%m-%d %H:%M:%S")
+        reg_id = str(registro["id_registro"])
+    else:
+        # precisa do motorista_id/telefone
+        # (reutiliza MultaService só para buscar motorista)
+        # - tipos_multa não precisa aqui; mas mantemos o padrão
+        tipos_dummy = tipos_multa_csv or os.path.join(os.path.dirname(motoristas_csv), "tipos_multa.csv")
+        service = MultaService(motoristas_csv, tipos_dummy, cache_dir=cache_dir)
+
+        motor = service.buscar_motorista(motorista_nome)
+        v_com, v_sem = service.calcular_valores(valor_base_num)
+
+        now = datetime.now()
+        reg_id = now.strftime("%Y%m%d%H%M%S")
     data_nome = extracao["data_multa"].replace("/", "-")
 
     # X no template
@@ -146,10 +198,14 @@ def gerar_pdf_final(
         # PDF final vai para output (um único arquivo)
         os.makedirs(output_dir, exist_ok=True)
         final_name = f"Autorização Desconto {sanitize_filename(motorista_nome)} {data_nome}.pdf"
-        final_path = os.path.join(output_dir, final_name)
+        final_path = caminho_livre(output_dir, final_name, reg_id)
 
         merge_pdfs([termo_pdf_path, pdf_notificacao], final_path)
 
+        # notificação repetida vira a mesma chave (guardada uma vez só)
+        chave_notificacao = arquivo.guardar_arquivo(pdf_notificacao) if arquivo else ""
+        chave_termo = arquivo.guardar_arquivo(termo_pdf_path) if arquivo else ""
+
         # log row (somente campos que você definiu)
         # data_multa: converter dd/mm/yyyy -> yyyy-mm-dd
         dt_iso = datetime.strptime(extracao["data_multa"], "%d/%m/%Y").strftime("%Y-%m-%d")
@@ -173,6 +229,8 @@ def gerar_pdf_final(
             "valor_sem_indicacao": v_sem,
             "decisao_indicar": indicar,
             "gravidade_multa": multa_atual["gravidade_multa"],
+            "chave_notificacao": chave_notificacao,
+            "chave_termo": chave_termo,
         }
 
         return {"pdf_final_path": final_path, "log_row": log_row}
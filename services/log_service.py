@@ -1,10 +1,37 @@
 import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime, date
+
+import numpy as np
 import pandas as pd
 
+from utils.helpers import trava_arquivo, sha256_arquivo
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+
 class LogService:
-    def __init__(self, log_csv_path: str):
+    def __init__(self, log_csv_path: str, particionar_por: str = "data_multa"):
+        """
+        O log é gravado em partições mensais dentro de uma pasta com o mesmo
+        nome do CSV (ex: logs_multas.csv -> logs_multas/logs_multas_2026-01.csv).
+        O próprio logs_multas.csv continua existindo como cópia única (Power BI),
+        regenerada a partir das partições.
+        particionar_por: "data_multa" ou "data_registro" (mês usado na partição).
+        """
+        if particionar_por not in ("data_multa", "data_registro"):
+            raise ValueError(f"particionar_por inválido: {particionar_por}")
+
         self.path = log_csv_path
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.particionar_por = particionar_por
+        self.dir = os.path.splitext(self.path)[0]
+        self.prefixo = os.path.basename(self.dir)
+        self.manifest_path = os.path.join(self.dir, MANIFEST_NAME)
+        os.makedirs(self.dir, exist_ok=True)
 
         # Cabeçalho fixo que você pediu
         self.columns = [
@@ -16,11 +43,420 @@ class LogService:
             "valor_base", "pontos",
             "valor_com_indicacao", "valor_sem_indicacao",
             "decisao_indicar", "gravidade_multa",
+            # chaves no ArquivoService (vazias em registros antigos)
+            "chave_notificacao", "chave_termo",
         ]
 
+        # partições já lidas: mes -> (sha256, df, índices). Invalida quando o checksum muda.
+        self._cache: dict[str, tuple[str, pd.DataFrame, dict]] = {}
+        # o histórico consulta de uma thread de fundo
+        self._lock_leitura = threading.RLock()
+
+        self._manifest_stat = None
+        self.manifest = self._load_manifest()
+
+        with self._trava():
+            self._recarregar_manifest(forcar=True)
+            self._sincronizar_particoes()
+            self._migrar_legado()
+            if self.manifest.get("exportado") != self._stat_export():
+                self._exportar_compat()
+
+    # =========================
+    # Manifest
+    # =========================
+    def _trava(self, timeout: float = 15.0):
+        # app + API usam o mesmo log; toda escrita relê o manifest dentro da trava
+        return trava_arquivo(os.path.join(self.dir, LOCK_NAME), timeout)
+
+    def _stat_manifest(self):
+        try:
+            st = os.stat(self.manifest_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _recarregar_manifest(self, forcar: bool = False):
+        # outro processo pode ter gravado: relê se o manifest mudou em disco
+        atual = self._stat_manifest()
+        if forcar or atual != self._manifest_stat:
+            self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        self._manifest_stat = self._stat_manifest()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("particionar_por") != self.particionar_por:
+                raise RuntimeError(
+                    f"Log já particionado por {manifest.get('particionar_por')}, "
+                    f"não por {self.particionar_por}: {self.dir}"
+                )
+            return manifest
+        return {"particionar_por": self.particionar_por, "particoes": {}}
+
+    def _save_manifest(self):
+        # grava em arquivo temporário e troca (evita manifest pela metade)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+        self._manifest_stat = self._stat_manifest()
+
+    def _arquivo_particao(self, mes: str) -> str:
+        return os.path.join(self.dir, f"{self.prefixo}_{mes}.csv")
+
+    def _mes_da_linha(self, row: dict) -> str:
+        # data_multa vem yyyy-mm-dd; data_registro vem yyyy-mm-dd HH:MM:SS
+        valor = str(row.get(self.particionar_por, "") or "")[:7]
+        try:
+            datetime.strptime(valor, "%Y-%m")
+            return valor
+        except ValueError:
+            return "sem-data"
+
+    def _info_particao(self, mes: str) -> dict:
+        # recalcula a entrada do manifest a partir do próprio arquivo da partição
+        arquivo = self._arquivo_particao(mes)
+        ids = pd.read_csv(arquivo, dtype=str, keep_default_na=False, encoding="utf-8", usecols=["id_registro"])
+        ids = ids["id_registro"]
+        return {
+            "arquivo": os.path.basename(arquivo),
+            "linhas": int(len(ids)),
+            "id_min": ids.min() if len(ids) else "",
+            "id_max": ids.max() if len(ids) else "",
+            "bytes": os.path.getsize(arquivo),
+            "sha256": sha256_arquivo(arquivo),
+        }
+
+    def _atualizar_particao(self, mes: str, ids: list[str], bytes_antes: int):
+        arquivo = self._arquivo_particao(mes)
+        info = self.manifest["particoes"].get(mes)
+        ids = [str(i) for i in ids]
+        # entrada ausente ou que não bate com o arquivo (escrita fora da trava): recalcula
+        if info is None or info.get("bytes") != bytes_antes or not info.get("id_min"):
+            self.manifest["particoes"][mes] = self._info_particao(mes)
+            return
+        info["linhas"] += len(ids)
+        info["id_min"] = min([info["id_min"]] + ids)
+        info["id_max"] = max([info["id_max"]] + ids)
+        info["bytes"] = os.path.getsize(arquivo)
+        info["sha256"] = sha256_arquivo(arquivo)
+
+    def _sincronizar_particoes(self):
+        """
+        Confere o manifest com os arquivos em disco (tamanho): partição que
+        não está no manifest ou mudou de tamanho tem a entrada recalculada.
+        """
+        padrao = re.compile(re.escape(self.prefixo) + r"_(\d{4}-\d{2}|sem-data)\.csv$")
+        mudou = False
+        em_disco = set()
+        for nome in os.listdir(self.dir):
+            m = padrao.match(nome)
+            if not m:
+                continue
+            mes = m.group(1)
+            em_disco.add(mes)
+            info = self.manifest["particoes"].get(mes)
+            if info is None or info.get("bytes") != os.path.getsize(os.path.join(self.dir, nome)):
+                self.manifest["particoes"][mes] = self._info_particao(mes)
+                mudou = True
+        for mes in list(self.manifest["particoes"]):
+            if mes not in em_disco:
+                del self.manifest["particoes"][mes]
+                mudou = True
+        if mudou:
+            self._save_manifest()
+
+    def _destino_legado(self) -> str:
+        # nunca sobrescreve um .legado.csv que já exista
+        base = os.path.splitext(self.path)[0] + ".legado"
+        destino = base + ".csv"
+        n = 1
+        while os.path.exists(destino):
+            destino = f"{base}-{n}.csv"
+            n += 1
+        return destino
+
+    def _migrar_legado(self):
+        """
+        Se o logs_multas.csv não é a cópia que o próprio LogService gerou
+        (versão antiga do app ou backup restaurado), leva para as partições só
+        as linhas cujo id_registro ainda não está no log e guarda o original
+        em *.legado.csv. A cópia única é regenerada em seguida.
+        Chamado dentro da trava.
+        """
+        if not os.path.exists(self.path) or self.manifest.get("exportado") == self._stat_export():
+            return
+
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False, encoding="utf-8")
+        for c in self.columns:
+            if c not in df.columns:
+                df[c] = ""
+
+        # ids já migrados (cobre a queda entre gravar as partições e renomear)
+        if self.manifest["particoes"]:
+            existentes = set(self._ler_particoes(list(self.manifest["particoes"]))["id_registro"])
+            df = df.loc[~df["id_registro"].isin(existentes)]
+
+        if not df.empty:
+            shutil.copy2(self.path, self._destino_legado())
+            self._gravar_linhas(df[self.columns].to_dict("records"))
+
+    # =========================
+    # Cópia única (compatibilidade: Power BI lê logs_multas.csv)
+    # =========================
+    def _stat_export(self):
+        try:
+            st = os.stat(self.path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def _exportar_compat(self):
+        """
+        Regrava logs_multas.csv com todas as partições (arquivo temporário +
+        os.replace) e guarda no manifest o (mtime, tamanho) da cópia gerada.
+        Chamado dentro da trava. Se o arquivo estiver aberto (Windows),
+        fica para a próxima escrita.
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", prefix=".logs_", suffix=".csv")
+        os.close(fd)
+        try:
+            self._ler_particoes(list(self.manifest["particoes"])).to_csv(tmp, index=False, encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.manifest["exportado"] = self._stat_export()
+        except OSError:
+            self.manifest["exportado"] = None
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._save_manifest()
+
+    def _anexar_compat(self, rows: list[dict]):
+        # cópia em dia: só acrescenta as linhas novas; senão regenera inteira
+        if self.manifest.get("exportado") != self._stat_export():
+            self._exportar_compat()
+            return
+        try:
+            pd.DataFrame(rows, columns=self.columns).to_csv(
+                self.path, mode="a", header=False, index=False, encoding="utf-8"
+            )
+            self.manifest["exportado"] = self._stat_export()
+        except OSError:
+            self.manifest["exportado"] = None
+        self._save_manifest()
+
+    # =========================
+    # Escrita
+    # =========================
+    def _gravar_linhas(self, rows: list[dict]):
+        # chamado dentro da trava, com o manifest recém-relido
+        por_mes: dict[str, list[dict]] = {}
+        for row in rows:
+            por_mes.setdefault(self._mes_da_linha(row), []).append(row)
+
+        for mes, linhas in por_mes.items():
+            arquivo = self._arquivo_particao(mes)
+            df = pd.DataFrame(linhas, columns=self.columns)
+            self._ajustar_cabecalho(arquivo)
+            file_exists = os.path.exists(arquivo)
+            bytes_antes = os.path.getsize(arquivo) if file_exists else 0
+            if not file_exists:
+                self.manifest["particoes"].pop(mes, None)
+            df.to_csv(arquivo, mode="a", header=not file_exists, index=False, encoding="utf-8")
+            self._atualizar_particao(mes, df["id_registro"].tolist(), bytes_antes)
+
+        self._save_manifest()
+
+    def _ajustar_cabecalho(self, arquivo: str):
+        # partição criada com colunas antigas: regrava com o cabeçalho atual antes do append
+        if not os.path.exists(arquivo):
+            return
+        with open(arquivo, "r", encoding="utf-8") as f:
+            header = f.readline().strip()
+        if header == ",".join(self.columns):
+            return
+        df = pd.read_csv(arquivo, dtype=str, keep_default_na=False, encoding="utf-8")
+        for c in self.columns:
+            if c not in df.columns:
+                df[c] = ""
+        tmp = arquivo + ".tmp"
+        df[self.columns].to_csv(tmp, index=False, encoding="utf-8")
+        os.replace(tmp, arquivo)
+
     def registrar(self, row: dict):
         # garante as colunas, mesmo se faltar algo (evita quebrar Power BI)
         out = {c: row.get(c, "") for c in self.columns}
-        df = pd.DataFrame([out])
-        file_exists = os.path.exists(self.path)
-        df.to_csv(self.path, mode="a", header=not file_exists, index=False, encoding="utf-8")
\ No newline at end of file
+        with self._trava():
+            self._recarregar_manifest(forcar=True)
+            self._gravar_linhas([out])
+            self._anexar_compat([out])
+
+    # =========================
+    # Leitura
+    # =========================
+    def _particao(self, mes: str) -> tuple[pd.DataFrame, dict] | None:
+        with self._lock_leitura:
+            return self._carregar_particao(mes)
+
+    def _carregar_particao(self, mes: str) -> tuple[pd.DataFrame, dict] | None:
+        info = self.manifest["particoes"][mes]
+        cached = self._cache.get(mes)
+        if cached and cached[0] == info.get("sha256"):
+            return cached[1], cached[2]
+
+        arquivo = os.path.join(self.dir, info["arquivo"])
+        if not os.path.exists(arquivo):
+            return None
+        df = pd.read_csv(arquivo, dtype=str, keep_default_na=False, encoding="utf-8")
+        for c in self.columns:
+            if c not in df.columns:
+                df[c] = ""
+        df = df[self.columns]
+
+        # índices valor -> posições, para filtros de igualdade sem varrer a partição
+        indices = {
+            "placa": df.groupby(df["placa"].str.upper(), sort=False).indices,
+            "gravidade_multa": df.groupby(df["gravidade_multa"].str.upper(), sort=False).indices,
+        }
+        self._cache[mes] = (info.get("sha256"), df, indices)
+        return df, indices
+
+    def _ler_particoes(self, meses: list[str]) -> pd.DataFrame:
+        frames = []
+        for mes in sorted(meses):
+            part = self._particao(mes)
+            if part is not None:
+                frames.append(part[0])
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def _meses_no_periodo(self, inicio, fim) -> list[str]:
+        meses = list(self.manifest["particoes"].keys())
+        # só dá para podar partições quando o filtro é na mesma coluna da partição
+        if self.particionar_por != "data_multa" or (inicio is None and fim is None):
+            return meses
+        mes_ini = pd.Timestamp(inicio).strftime("%Y-%m") if inicio is not None else "0000-00"
+        mes_fim = pd.Timestamp(fim).strftime("%Y-%m") if fim is not None else "9999-99"
+        return [m for m in meses if m != "sem-data" and mes_ini <= m <= mes_fim]
+
+    def preparar_consulta(
+        self,
+        motorista: str = "",
+        placa: str = "",
+        inicio: date | str | None = None,
+        fim: date | str | None = None,
+        gravidade: str = "",
+        ordenar_por: str = "id_registro",
+        decrescente: bool = True,
+    ) -> "ConsultaLog":
+        """
+        Consulta filtrada/ordenada para o histórico. Só resolve a ordem
+        (partição, posição) das linhas; as linhas são montadas por página
+        em ConsultaLog.pagina().
+        - motorista: trecho do nome (sem diferenciar maiúsculas)
+        - placa / gravidade: igualdade, resolvida pelos índices de cada partição
+        - inicio / fim: faixa de data_multa (poda as partições fora do período)
+        """
+        if ordenar_por not in self.columns:
+            raise ValueError(f"Coluna inválida para ordenar: {ordenar_por}")
+
+        placa = placa.strip().upper().replace("-", "").replace(" ", "")
+        gravidade = gravidade.strip().upper()
+        motorista = motorista.strip().upper()
+        dia_ini = pd.Timestamp(inicio).date().isoformat() if inicio is not None else None
+        dia_fim = pd.Timestamp(fim).date().isoformat() if fim is not None else None
+        numerica = ordenar_por in ("valor_base", "pontos", "valor_com_indicacao", "valor_sem_indicacao")
+
+        with self._lock_leitura:
+            self._recarregar_manifest()
+            meses = sorted(self._meses_no_periodo(inicio, fim))
+
+            frames, partes, posicoes, chaves = [], [], [], []
+            for mes in meses:
+                part = self._particao(mes)
+                if part is None:
+                    continue
+                df, indices = part
+
+                pos = None
+                for col, valor in (("placa", placa), ("gravidade_multa", gravidade)):
+                    if not valor:
+                        continue
+                    achados = indices[col].get(valor)
+                    if achados is None:
+                        pos = np.array([], dtype=np.int64)
+                        break
+                    pos = achados if pos is None else np.intersect1d(pos, achados)
+                if pos is None:
+                    pos = np.arange(len(df))
+                if len(pos) == 0:
+                    continue
+
+                mask = np.ones(len(pos), dtype=bool)
+                if motorista:
+                    nomes = df["nome_motorista"].iloc[pos].str.upper()
+                    mask &= nomes.str.contains(motorista, regex=False).to_numpy()
+                if dia_ini is not None or dia_fim is not None:
+                    dias = df["data_multa"].iloc[pos].str[:10]
+                    if dia_ini is not None:
+                        mask &= (dias >= dia_ini).to_numpy()
+                    if dia_fim is not None:
+                        mask &= (dias <= dia_fim).to_numpy()
+                pos = pos[mask]
+                if len(pos) == 0:
+                    continue
+
+                chave = df[ordenar_por].iloc[pos]
+                if numerica:
+                    chave = pd.to_numeric(chave, errors="coerce")
+                partes.append(np.full(len(pos), len(frames), dtype=np.int64))
+                posicoes.append(np.asarray(pos, dtype=np.int64))
+                chaves.append(chave.to_numpy())
+                frames.append(df)
+
+        if not frames:
+            return ConsultaLog([], np.array([], dtype=np.int64), np.array([], dtype=np.int64), self.columns)
+
+        # ordena só a coluna-chave (não as linhas inteiras)
+        ordem = (
+            pd.Series(np.concatenate(chaves))
+            .sort_values(ascending=not decrescente, kind="stable", na_position="last")
+            .index.to_numpy()
+        )
+        return ConsultaLog(frames, np.concatenate(partes)[ordem], np.concatenate(posicoes)[ordem], self.columns)
+
+
+class ConsultaLog:
+    """
+    Resultado de LogService.preparar_consulta: a ordem final já resolvida como
+    pares (partição, posição). As linhas só são montadas em pagina(), então
+    percorrer o resultado custa proporcional ao que é exibido.
+    """
+
+    def __init__(self, frames: list[pd.DataFrame], partes: np.ndarray, posicoes: np.ndarray, columns: list[str]):
+        self._frames = frames
+        self._partes = partes
+        self._posicoes = posicoes
+        self.columns = columns
+
+    @property
+    def total(self) -> int:
+        return len(self._posicoes)
+
+    def pagina(self, offset: int, limite: int) -> pd.DataFrame:
+        partes = self._partes[offset:offset + limite]
+        posicoes = self._posicoes[offset:offset + limite]
+        if len(partes) == 0:
+            return pd.DataFrame(columns=self.columns)
+
+        pedacos, ordem = [], []
+        for i in np.unique(partes):
+            sel = np.nonzero(partes == i)[0]
+            pedacos.append(self._frames[i].iloc[posicoes[sel]])
+            ordem.append(sel)
+        out = pd.concat(pedacos, ignore_index=True)
+        out = out.iloc[np.argsort(np.concatenate(ordem), kind="stable")]
+        return out.reset_index(drop=True)
@@ -0,0 +1,189 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+COLUNA_CODIGO = "Cód. Motorista"
+COLUNA_NOME = "Nome Curto"
+COLUNA_CPF = "CPF"
+COLUNA_TELEFONE = "TELEFONE"
+
+COLUNAS_RELATORIO = ["linha", "coluna", "valor", "problema", "severidade"]
+
+PESOS_DV1 = np.arange(10, 1, -1)
+PESOS_DV2 = np.arange(11, 1, -1)
+
+def _ler_csv(path: str) -> pd.DataFrame:
+    # tudo como texto: CPF/telefone/código não podem perder zeros à esquerda
+    try:
+        df = pd.read_csv(path, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    except UnicodeDecodeError:
+        df = pd.read_csv(path, sep=";", encoding="latin-1", dtype=str, keep_default_na=False)
+    df.columns = df.columns.astype(str).str.replace("\ufeff", "", regex=False).str.strip()
+    return df
+
+def normalizar_nome(s: pd.Series) -> pd.Series:
+    # sem acento, maiúsculo e com espaços simples: "Adão  Cunha" == "ADAO CUNHA"
+    return (
+        s.astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.upper()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+def cpf_valido(digitos: pd.Series) -> pd.Series:
+    """
+    digitos: CPFs só com números (11 posições). Calcula os dois dígitos
+    verificadores de todos de uma vez, como matriz (n, 11).
+    """
+    ok = pd.Series(False, index=digitos.index)
+    # só ASCII 0-9: dígito Unicode (ex: "５") quebraria o encode abaixo
+    tam_ok = digitos.str.fullmatch(r"[0-9]{11}").fillna(False)
+    if not tam_ok.any():
+        return ok
+
+    bruto = "".join(digitos[tam_ok]).encode("ascii")
+    m = (np.frombuffer(bruto, dtype=np.uint8) - ord("0")).astype(np.int64).reshape(-1, 11)
+
+    dv1 = (m[:, :9] @ PESOS_DV1) * 10 % 11 % 10
+    dv2 = (m[:, :10] @ PESOS_DV2) * 10 % 11 % 10
+    repetido = (m == m[:, [0]]).all(axis=1)  # 000.000.000-00, 111..., etc.
+
+    ok[tam_ok] = (m[:, 9] == dv1) & (m[:, 10] == dv2) & ~repetido
+    return ok
+
+def normalizar_telefone(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Retorna (telefone formatado "(DD) 9XXXX-XXXX", válido?).
+    Aceita +55, 0 antes do DDD e qualquer pontuação.
+    """
+    d = s.astype(str).str.replace(r"[^0-9]", "", regex=True)
+    d = d.where(~(d.str.len().isin([12, 13]) & d.str.startswith("55")), d.str[2:])
+    d = d.where(~(d.str.len().isin([11, 12]) & d.str.startswith("0")), d.str[1:])
+
+    valido = (
+        d.str.fullmatch(r"[1-9]{2}9[0-9]{8}")      # celular
+        | d.str.fullmatch(r"[1-9]{2}[2-5][0-9]{7}")  # fixo
+    ).fillna(False)
+
+    fmt = d.str.replace(r"^([0-9]{2})([0-9]{4,5})([0-9]{4})$", r"(\1) \2-\3", regex=True)
+    return fmt.where(valido, s.astype(str).str.strip()), valido
+
+def _problemas(df: pd.DataFrame, mask: pd.Series, coluna: str, problema: str, severidade: str) -> pd.DataFrame:
+    sel = df.loc[mask]
+    return pd.DataFrame({
+        "linha": sel.index + 2,  # +1 do cabeçalho, +1 porque planilha começa em 1
+        "coluna": coluna,
+        "valor": sel[coluna].astype(str) if coluna in sel.columns else "",
+        "problema": problema,
+        "severidade": severidade,
+    })
+
+def validar_motoristas(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Valida o cadastro inteiro numa passada (operações vetorizadas do pandas).
+    Retorna (df normalizado, relatório). Severidade ERRO bloqueia a importação;
+    AVISO só vai para o relatório.
+    """
+    df = df.reset_index(drop=True).copy()
+    partes = []
+
+    for col in (COLUNA_NOME, COLUNA_TELEFONE):
+        if col not in df.columns:
+            raise RuntimeError(f"motoristas.csv precisa ter coluna: {col}")
+
+    # ----- Nome
+    df[COLUNA_NOME] = df[COLUNA_NOME].astype(str).str.replace(r"\s+", " ", regex=True).str.strip()
+    nome_norm = normalizar_nome(df[COLUNA_NOME])
+    vazio = nome_norm == ""
+    partes.append(_problemas(df, vazio, COLUNA_NOME, "nome vazio", "ERRO"))
+    dup = nome_norm.duplicated(keep=False) & ~vazio
+    partes.append(_problemas(df, dup, COLUNA_NOME, "nome duplicado (ignorando acentos/maiúsculas)", "ERRO"))
+
+    # ----- Código
+    if COLUNA_CODIGO in df.columns:
+        df[COLUNA_CODIGO] = df[COLUNA_CODIGO].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+        cod_vazio = df[COLUNA_CODIGO] == ""
+        partes.append(_problemas(df, cod_vazio, COLUNA_CODIGO, "código vazio", "AVISO"))
+        dup = df[COLUNA_CODIGO].duplicated(keep=False) & ~cod_vazio
+        partes.append(_problemas(df, dup, COLUNA_CODIGO, "código duplicado", "ERRO"))
+
+    # ----- CPF
+    if COLUNA_CPF in df.columns:
+        digitos = df[COLUNA_CPF].astype(str).str.replace(r"[^0-9]", "", regex=True)
+        cpf_vazio = df[COLUNA_CPF].astype(str).str.strip() == ""
+        # planilha costuma comer zeros à esquerda
+        digitos = digitos.where((digitos == "") | (digitos.str.len() > 11), digitos.str.zfill(11))
+        ok = cpf_valido(digitos)
+        partes.append(_problemas(df, cpf_vazio, COLUNA_CPF, "CPF vazio", "AVISO"))
+        # CPF não é usado no termo nem na busca: inválido só avisa
+        partes.append(_problemas(df, ~ok & ~cpf_vazio, COLUNA_CPF, "CPF inválido (dígito verificador)", "AVISO"))
+        dup = digitos.duplicated(keep=False) & ok
+        partes.append(_problemas(df, dup, COLUNA_CPF, "CPF duplicado", "ERRO"))
+        df[COLUNA_CPF] = digitos.where(ok, df[COLUNA_CPF].astype(str).str.strip())
+
+    # ----- Telefone
+    fone, fone_ok = normalizar_telefone(df[COLUNA_TELEFONE])
+    fone_vazio = df[COLUNA_TELEFONE].astype(str).str.strip().isin(["", "nan"])
+    partes.append(_problemas(df, fone_vazio, COLUNA_TELEFONE, "telefone vazio", "AVISO"))
+    partes.append(_problemas(df, ~fone_ok & ~fone_vazio, COLUNA_TELEFONE, "telefone inválido", "AVISO"))
+    df[COLUNA_TELEFONE] = fone.where(~fone_vazio, "")
+
+    relatorio = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_RELATORIO)
+    relatorio = relatorio.sort_values(["linha", "coluna"], kind="stable").reset_index(drop=True)
+    return df, relatorio
+
+def caminho_motoristas(app_dir: str, data_dir: str) -> str:
+    """
+    Cadastro em uso: o importado (na pasta persistente do app) se existir;
+    senão o que vem junto com o app em data/.
+    """
+    importado = os.path.join(app_dir, "motoristas.csv")
+    return importado if os.path.exists(importado) else os.path.join(data_dir, "motoristas.csv")
+
+def importar_motoristas(origem_csv: str, destino_csv: str, relatorio_csv: str | None = None,
+                        forcar: bool = False) -> dict:
+    """
+    Valida origem_csv e, se não houver ERRO (ou forcar=True), troca o
+    destino_csv de forma atômica (arquivo temporário + os.replace).
+    O cadastro anterior fica em <destino>.anterior.csv.
+    Retorna {ok, importado, linhas, erros, avisos, relatorio_csv}.
+    """
+    df, relatorio = validar_motoristas(_ler_csv(origem_csv))
+
+    erros = int((relatorio["severidade"] == "ERRO").sum())
+    avisos = int((relatorio["severidade"] == "AVISO").sum())
+
+    if relatorio_csv:
+        os.makedirs(os.path.dirname(relatorio_csv) or ".", exist_ok=True)
+        relatorio.to_csv(relatorio_csv, sep=";", index=False, encoding="utf-8-sig")
+
+    importado = False
+    if erros == 0 or forcar:
+        destino_dir = os.path.dirname(destino_csv) or "."
+        os.makedirs(destino_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=destino_dir, prefix=".motoristas_", suffix=".csv")
+        os.close(fd)
+        try:
+            df.to_csv(tmp, sep=";", index=False, encoding="utf-8-sig")
+            if os.path.exists(destino_csv):
+                shutil.copy2(destino_csv, os.path.splitext(destino_csv)[0] + ".anterior.csv")
+            os.replace(tmp, destino_csv)
+            importado = True
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    return {
+        "ok": erros == 0,
+        "importado": importado,
+        "linhas": len(df),
+        "erros": erros,
+        "avisos": avisos,
+        "relatorio_csv": relatorio_csv,
+    }
@@ -1,8 +1,12 @@
 import os
+import json
+import mmap
+import pickle
+import struct
 import pandas as pd
 from datetime import datetime
 
-from utils.helpers import parse_money_to_float, format_brl
+from utils.helpers import parse_money_to_float, format_brl, sha256_arquivo
 
 MESSAGE_TEMPLATE = (
     "Bom dia {nome_motorista}, tudo bem?\n\n"
@@ -13,13 +17,32 @@ MESSAGE_TEMPLATE = (
     "Sobre o pagamento o senhor pode discutir com o RH sobre parcelamentos pra acertarem da melhor forma."
 )
 
+SNAPSHOT_MAGIC = b"AMSNAP1\n"
+SNAPSHOT_NAME = "catalogos.snapshot"
+
 class MultaService:
-    def __init__(self, motoristas_csv: str, tipos_multa_csv: str):
+    def __init__(self, motoristas_csv: str, tipos_multa_csv: str, cache_dir: str | None = None):
+        """
+        cache_dir: se informado, guarda os catálogos já tratados num snapshot binário
+        (catalogos.snapshot) e só refaz o parse dos CSVs quando algum deles mudar.
+        """
         if not os.path.exists(motoristas_csv):
             raise FileNotFoundError(f"motoristas.csv não encontrado: {motoristas_csv}")
         if not os.path.exists(tipos_multa_csv):
             raise FileNotFoundError(f"tipos_multa.csv não encontrado: {tipos_multa_csv}")
 
+        fontes = {"motoristas": motoristas_csv, "tipos_multa": tipos_multa_csv}
+        snapshot_path = os.path.join(cache_dir, SNAPSHOT_NAME) if cache_dir else None
+
+        if snapshot_path and self._load_snapshot(snapshot_path, fontes):
+            return
+
+        self._parse_catalogos(motoristas_csv, tipos_multa_csv)
+
+        if snapshot_path:
+            self._save_snapshot(snapshot_path, fontes)
+
+    def _parse_catalogos(self, motoristas_csv: str, tipos_multa_csv: str):
         self.motoristas_df = self._load_csv(motoristas_csv)
         self.tipos_df = self._load_csv(tipos_multa_csv)
 
@@ -34,6 +57,110 @@ class MultaService:
         self.tipos_df["COD_MULTA"] = self.tipos_df["COD_MULTA"].astype(str).str.strip()
         self.tipos_df["_valor_float"] = self.tipos_df["VALOR"].apply(parse_money_to_float)
 
+        # índices de busca: chave -> posição da 1ª ocorrência (mesmo resultado do .iloc[0])
+        self._idx_motorista = {}
+        for pos, nome in enumerate(self.motoristas_df["Nome Curto"].astype(str)):
+            self._idx_motorista.setdefault(nome, pos)
+        self._idx_multa = {}
+        for pos, cod in enumerate(self.tipos_df["COD_MULTA"]):
+            self._idx_multa.setdefault(cod, pos)
+
+    # =========================
+    # Snapshot dos catálogos
+    # =========================
+    def _fingerprint(self, path: str, com_hash: bool = True) -> dict:
+        st = os.stat(path)
+        fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if com_hash:
+            fp["sha256"] = sha256_arquivo(path)
+        return fp
+
+    def _fonte_igual(self, path: str, salvo: dict) -> dict | None:
+        """
+        Retorna o fingerprint atual se o CSV não mudou, senão None.
+        """
+        # tamanho+mtime iguais: não precisa nem ler o CSV
+        atual = self._fingerprint(path, com_hash=False)
+        if atual["size"] != salvo.get("size"):
+            return None
+        if atual["mtime_ns"] == salvo.get("mtime_ns"):
+            return salvo
+        # mtime mudou (cópia, checkout...) mas o conteúdo pode ser o mesmo
+        sha = sha256_arquivo(path)
+        if sha != salvo.get("sha256"):
+            return None
+        return {**atual, "sha256": sha}
+
+    def _load_snapshot(self, snapshot_path: str, fontes: dict) -> bool:
+        """
+        Formato: MAGIC + uint32 (tamanho do cabeçalho) + cabeçalho JSON + pickle.
+        Lido via mmap numa única passada; qualquer problema => parse normal.
+        """
+        try:
+            with open(snapshot_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                    return False
+                pos = len(SNAPSHOT_MAGIC)
+                (header_len,) = struct.unpack_from("<I", mm, pos)
+                pos += 4
+                header = json.loads(mm[pos:pos + header_len].decode("utf-8"))
+
+                salvos = header.get("fontes", {})
+                atuais = {}
+                for nome, path in fontes.items():
+                    fp = self._fonte_igual(path, salvos[nome]) if nome in salvos else None
+                    if fp is None:
+                        return False
+                    atuais[nome] = fp
+
+                # conteúdo igual com mtime novo: grava o mtime novo para não re-hashear a cada abertura
+                reescrever = atuais != salvos
+                with memoryview(mm) as view, view[pos + header_len:] as payload_view:
+                    data = pickle.loads(payload_view)
+                    payload = bytes(payload_view) if reescrever else None
+        except Exception:
+            return False
+
+        if reescrever:
+            self._gravar_snapshot(snapshot_path, {"fontes": atuais}, payload)
+
+        self.motoristas_df = data["motoristas_df"]
+        self.tipos_df = data["tipos_df"]
+        self._idx_motorista = data["idx_motorista"]
+        self._idx_multa = data["idx_multa"]
+        return True
+
+    def _gravar_snapshot(self, snapshot_path: str, header: dict, payload: bytes):
+        try:
+            os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+            header = json.dumps(header).encode("utf-8")
+            tmp = snapshot_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(payload)
+            os.replace(tmp, snapshot_path)
+        except Exception:
+            # snapshot é só otimização; sem ele o app continua funcionando
+            pass
+
+    def _save_snapshot(self, snapshot_path: str, fontes: dict):
+        try:
+            header = {"fontes": {nome: self._fingerprint(path) for nome, path in fontes.items()}}
+            payload = pickle.dumps(
+                {
+                    "motoristas_df": self.motoristas_df,
+                    "tipos_df": self.tipos_df,
+                    "idx_motorista": self._idx_motorista,
+                    "idx_multa": self._idx_multa,
+                },
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        except Exception:
+            return
+        self._gravar_snapshot(snapshot_path, header, payload)
+
     def _load_csv(self, path: str) -> pd.DataFrame:
         try:
             df = pd.read_csv(path, sep=";", encoding="utf-8-sig")
@@ -47,10 +174,10 @@ class MultaService:
 
     def buscar_motorista(self, nome: str) -> dict:
         df = self.motoristas_df
-        row = df.loc[df["Nome Curto"].astype(str) == str(nome)]
-        if row.empty:
+        pos = self._idx_motorista.get(str(nome))
+        if pos is None:
             raise RuntimeError("Motorista não encontrado no motoristas.csv")
-        r = row.iloc[0]
+        r = df.iloc[pos]
         motorista_id = str(r["Cód. Motorista"]) if "Cód. Motorista" in df.columns else ""
         return {
             "motorista_id": motorista_id,
@@ -59,10 +186,10 @@ class MultaService:
         }
 
     def buscar_multa_por_cod(self, cod_multa: str) -> dict:
-        row = self.tipos_df.loc[self.tipos_df["COD_MULTA"] == str(cod_multa).strip()]
-        if row.empty:
+        pos = self._idx_multa.get(str(cod_multa).strip())
+        if pos is None:
             raise RuntimeError(f"COD_MULTA {cod_multa} não encontrado no tipos_multa.csv")
-        m = row.iloc[0]
+        m = self.tipos_df.iloc[pos]
         valor_base = float(m["_valor_float"])
         pontos = int(m["PONTOS"])
         gravidade = str(m["GRAVIDADE"]).strip()
@@ -1,6 +1,14 @@
+import os
 import re
+import json
+import tempfile
+import unicodedata
+from datetime import datetime
+
 import pdfplumber
 
+from utils.helpers import trava_arquivo
+
 def extrair_texto_pdf(pdf_path: str) -> str:
     parts = []
     with pdfplumber.open(pdf_path) as pdf:
@@ -45,19 +53,24 @@ def extrair_cidade_uf_por_linhas(text: str):
 
     return None, None
 
-def extrair_campos_notificacao(pdf_path: str) -> dict:
-    text = extrair_texto_pdf(pdf_path)
+RE_PLACA = re.compile(r"\bPLACA\b.*?\n\s*([A-Z0-9]{7}|[A-Z]{3}\s*\-?\s*\d{4})\b", re.IGNORECASE)
+RE_DATA_HORA = re.compile(r"DATA\s+HORA.*?\b(\d{2}/\d{2}/\d{4})\s+(\d{2}:\d{2})\b", re.IGNORECASE | re.DOTALL)
+RE_CODIGO = re.compile(
+    r"C[ÓO]DIGO\s+DA\s+INFRA[CÇ][AÃ]O\s+DESDOBRAMENTO\s+VALOR\s+DA\s+MULTA\s*\n\s*(\d{4})\s+(\d)\s+(R\$\s*[0-9\.\,]+)",
+    re.IGNORECASE
+)
 
+def _campos_do_texto(text: str) -> tuple[dict, list[str]]:
     # PLACA
     placa = None
-    m = re.search(r"\bPLACA\b.*?\n\s*([A-Z0-9]{7}|[A-Z]{3}\s*\-?\s*\d{4})\b", text, re.IGNORECASE)
+    m = RE_PLACA.search(text)
     if m:
         placa = re.sub(r"\s|\-", "", m.group(1)).upper()
 
     # DATA + HORA
     data_multa = None
     hora_multa = None
-    m = re.search(r"DATA\s+HORA.*?\b(\d{2}/\d{2}/\d{4})\s+(\d{2}:\d{2})\b", text, re.IGNORECASE | re.DOTALL)
+    m = RE_DATA_HORA.search(text)
     if m:
         data_multa, hora_multa = m.group(1), m.group(2)
 
@@ -65,11 +78,7 @@ def extrair_campos_notificacao(pdf_path: str) -> dict:
     codigo_4d = None
     desdobramento = None
     valor_pdf = None
-    m = re.search(
-        r"C[ÓO]DIGO\s+DA\s+INFRA[CÇ][AÃ]O\s+DESDOBRAMENTO\s+VALOR\s+DA\s+MULTA\s*\n\s*(\d{4})\s+(\d)\s+(R\$\s*[0-9\.\,]+)",
-        text,
-        re.IGNORECASE
-    )
+    m = RE_CODIGO.search(text)
     if m:
         codigo_4d, desdobramento, valor_pdf = m.group(1), m.group(2), m.group(3)
 
@@ -85,15 +94,7 @@ def extrair_campos_notificacao(pdf_path: str) -> dict:
         "valor_pdf": valor_pdf
     }.items() if not v]
 
-    if missing:
-        raise RuntimeError(
-            "Não consegui extrair do PDF os campos:\n"
-            f"{missing}\n\n"
-            "📄 TEXTO EXTRAÍDO DO PDF (diagnóstico, primeiros 6000 chars):\n\n"
-            + text[:6000]
-        )
-
-    return {
+    campos = {
         "placa": placa,
         "data_multa": data_multa,
         "hora_multa": hora_multa,
@@ -103,6 +104,253 @@ def extrair_campos_notificacao(pdf_path: str) -> dict:
         "desdobramento": desdobramento,
         "valor_pdf": valor_pdf,
     }
+    return campos, missing
+
+# =========================
+# Extração por regiões (layouts aprendidos)
+# =========================
+MARGEM_X = 30  # pt: folga lateral p/ valores de tamanho variável (cidade, valor)
+MARGEM_Y = 2
+MAX_ALTURA = 0.08     # fração da página: caixa unida maior que isso vira outra candidata
+MAX_LARGURA = 0.9
+MAX_CANDIDATAS = 3    # caixas por campo (as mais antigas saem primeiro)
+TAM_ANCORA = 40
+
+def _ancora(page) -> str:
+    """
+    Cabeçalho do emissor: letras da primeira linha de texto da página 1
+    (sem dígitos, para não variar com nº do auto, datas etc.).
+    """
+    chars = [c for c in page.chars if c["text"].strip()]
+    if not chars:
+        return ""
+    topo = min(c["top"] for c in chars)
+    linha = sorted((c for c in chars if c["top"] - topo < 2), key=lambda c: c["x0"])
+    texto = unicodedata.normalize("NFKD", "".join(c["text"] for c in linha).upper())
+    return re.sub(r"[^A-Z]", "", texto)[:TAM_ANCORA]
+
+def _unir(a: list, b: list) -> list:
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+class LayoutsNotificacao:
+    """
+    Caixas (bbox) por layout de notificação, salvas em JSON:
+    {chave_layout: {campo: [{"pagina": i, "bbox": [x0, top, x1, bottom]}, ...]}}
+    A chave junta nº de páginas, tamanho e o cabeçalho do emissor. A bbox é
+    relativa ao tamanho da página (0..1). Cada acerto da extração completa
+    amplia a caixa do campo, até MAX_ALTURA x MAX_LARGURA; se passar disso,
+    o campo ganha outra caixa candidata (no máximo MAX_CANDIDATAS).
+    App e workers da API aprendem no mesmo JSON: salvar() relê o arquivo sob
+    trava e reaplica só as caixas aprendidas neste processo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.layouts: dict = {}
+        self._pendentes: list[tuple[str, str, dict]] = []  # (chave, campo, reg) ainda não salvos
+        self._stat = None
+        self._recarregar()
+
+    def _stat_arquivo(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _recarregar(self):
+        self._stat = self._stat_arquivo()
+        self.layouts = {}
+        if self._stat is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.layouts = json.load(f)
+            except (OSError, ValueError):
+                self.layouts = {}
+        for chave, campo, reg in self._pendentes:
+            self._incluir(chave, campo, dict(reg, bbox=list(reg["bbox"])))
+
+    def salvar(self):
+        pasta = os.path.dirname(self.path) or "."
+        os.makedirs(pasta, exist_ok=True)
+        with trava_arquivo(self.path + ".lock"):
+            self._recarregar()
+            fd, tmp = tempfile.mkstemp(dir=pasta, prefix=".layouts_", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.layouts, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            self._pendentes = []
+            self._stat = self._stat_arquivo()
+
+    def chave(self, pdf) -> str:
+        p0 = pdf.pages[0]
+        return f"{len(pdf.pages)}p-{round(p0.width)}x{round(p0.height)}-{_ancora(p0)}"
+
+    def _layout(self, chave: str) -> dict | None:
+        layout = self.layouts.get(chave)
+        if not layout:
+            return None
+        # formato antigo: uma caixa (dict) por campo
+        return {c: (v if isinstance(v, list) else [v]) for c, v in layout.items()}
+
+    def regioes(self, pdf) -> dict | None:
+        # outro processo pode ter aprendido/salvo desde a última leitura
+        if self._stat_arquivo() != self._stat:
+            self._recarregar()
+        return self._layout(self.chave(pdf))
+
+    def _incluir(self, chave: str, campo: str, reg: dict):
+        layout = self._layout(chave) or {}
+        candidatas = layout.get(campo, [])
+        for atual in candidatas:
+            if atual["pagina"] != reg["pagina"]:
+                continue
+            u = _unir(atual["bbox"], reg["bbox"])
+            if u[3] - u[1] <= MAX_ALTURA and u[2] - u[0] <= MAX_LARGURA:
+                atual["bbox"] = u
+                break
+        else:
+            candidatas = (candidatas + [reg])[-MAX_CANDIDATAS:]
+        layout[campo] = candidatas
+        self.layouts[chave] = layout
+
+    def aprender(self, pdf, campos: dict) -> bool:
+        padroes = {"placa": RE_PLACA, "data_hora": RE_DATA_HORA, "codigo": RE_CODIGO}
+        if campos.get("cidade") and campos.get("uf"):
+            padroes["municipio"] = re.compile(
+                r"NOME DO MUNIC[IÍ]PIO UF.*?" + re.escape(campos["cidade"].upper()) + r"\s+" + campos["uf"],
+                re.IGNORECASE | re.DOTALL,
+            )
+
+        achadas = {}
+        for i, page in enumerate(pdf.pages):
+            for campo, padrao in padroes.items():
+                if campo in achadas:
+                    continue
+                hits = page.search(padrao, return_chars=False)
+                if hits:
+                    h = hits[0]
+                    achadas[campo] = {
+                        "pagina": i,
+                        "bbox": [
+                            max(0.0, (h["x0"] - MARGEM_X) / page.width),
+                            max(0.0, (h["top"] - MARGEM_Y) / page.height),
+                            min(1.0, (h["x1"] + MARGEM_X) / page.width),
+                            min(1.0, (h["bottom"] + MARGEM_Y) / page.height),
+                        ],
+                    }
+            if len(achadas) == len(padroes):
+                break
+
+        # sem as 3 regiões obrigatórias não vale a pena guardar o layout
+        if not all(c in achadas for c in ("placa", "data_hora", "codigo")):
+            return False
+
+        chave = self.chave(pdf)
+        for campo, reg in achadas.items():
+            self._pendentes.append((chave, campo, reg))
+            self._incluir(chave, campo, dict(reg, bbox=list(reg["bbox"])))
+        return True
+
+_layouts_cache: dict[str, LayoutsNotificacao] = {}
+
+def _layouts(path: str) -> LayoutsNotificacao:
+    # em lote, o JSON é lido uma vez por processo
+    if path not in _layouts_cache:
+        _layouts_cache[path] = LayoutsNotificacao(path)
+    return _layouts_cache[path]
+
+def _texto_regioes(pdf, regioes: dict) -> str:
+    """
+    Um extract_text por página, só com os caracteres cujo centro cai em
+    alguma caixa (em vez de um crop + extract_text por campo).
+    """
+    caixas: dict[int, list] = {}
+    for candidatas in regioes.values():
+        for reg in candidatas:
+            caixas.setdefault(reg["pagina"], []).append(reg["bbox"])
+
+    partes = []
+    for i in sorted(caixas):
+        page = pdf.pages[i]
+        bboxes = [
+            (x0 * page.width, top * page.height, x1 * page.width, bottom * page.height)
+            for x0, top, x1, bottom in caixas[i]
+        ]
+
+        def dentro(obj, bboxes=bboxes):
+            if obj.get("object_type") != "char":
+                return False
+            cx = (obj["x0"] + obj["x1"]) / 2
+            cy = (obj["top"] + obj["bottom"]) / 2
+            return any(x0 <= cx <= x1 and top <= cy <= bottom for x0, top, x1, bottom in bboxes)
+
+        partes.append(page.filter(dentro).extract_text() or "")
+    return "\n".join(partes)
+
+def _extrair_por_regioes(pdf, regioes: dict) -> dict | None:
+    """
+    Roda os mesmos regex só no texto das caixas. Devolve None se algo
+    não validar (aí quem chamou cai para o texto da página inteira).
+    Sem caixa de município (ou cidade/UF vazias) também cai para o texto
+    inteiro, que lê a cidade pelas linhas e aprende a caixa que faltava.
+    """
+    if not all(c in regioes for c in ("placa", "data_hora", "codigo", "municipio")):
+        return None
+    try:
+        text = _texto_regioes(pdf, regioes)
+    except (KeyError, IndexError, ValueError, TypeError):
+        return None
+
+    campos, missing = _campos_do_texto(text)
+    if missing:
+        return None
+    if not (campos["cidade"] and campos["uf"]):
+        return None
+    try:
+        datetime.strptime(f"{campos['data_multa']} {campos['hora_multa']}", "%d/%m/%Y %H:%M")
+    except ValueError:
+        return None
+    return campos
+
+def extrair_campos_notificacao(pdf_path: str, layouts_path: str | None = None) -> dict:
+    """
+    layouts_path: se informado, tenta primeiro ler só as regiões aprendidas
+    para o layout do PDF; se não validar, usa o texto inteiro e aprende as caixas.
+    """
+    if layouts_path is None:
+        text = extrair_texto_pdf(pdf_path)
+        campos, missing = _campos_do_texto(text)
+    else:
+        layouts = _layouts(layouts_path)
+        with pdfplumber.open(pdf_path) as pdf:
+            regioes = layouts.regioes(pdf)
+            if regioes:
+                campos = _extrair_por_regioes(pdf, regioes)
+                if campos:
+                    return campos
+
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+            campos, missing = _campos_do_texto(text)
+            if not missing and layouts.aprender(pdf, campos):
+                try:
+                    layouts.salvar()
+                except (OSError, RuntimeError):
+                    pass  # fica pendente e vai junto no próximo salvar()
+
+    if missing:
+        raise RuntimeError(
+            "Não consegui extrair do PDF os campos:\n"
+            f"{missing}\n\n"
+            "📄 TEXTO EXTRAÍDO DO PDF (diagnóstico, primeiros 6000 chars):\n\n"
+            + text[:6000]
+        )
+
+    return campos
 
 def codigo_pdf_para_cod_multa(codigo_4d: str, desdobramento: str) -> str:
     # 7455 + 0 -> 745-50
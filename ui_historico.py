@@ -0,0 +1,243 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QDate, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import (
+    QDialog, QLabel, QPushButton, QLineEdit, QComboBox, QCheckBox, QDateEdit,
+    QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView, QHeaderView, QMessageBox
+)
+
+from services.log_service import LogService, ConsultaLog
+
+# colunas mostradas no histórico (chave no log, título)
+COLUNAS_HISTORICO = [
+    ("id_registro", "Registro"),
+    ("data_multa", "Data multa"),
+    ("hora_multa", "Hora"),
+    ("nome_motorista", "Motorista"),
+    ("placa", "Placa"),
+    ("cidade", "Cidade"),
+    ("uf", "UF"),
+    ("codigo_multa", "COD_MULTA"),
+    ("gravidade_multa", "Gravidade"),
+    ("valor_base", "Valor base"),
+    ("pontos", "Pontos"),
+    ("decisao_indicar", "Indicar"),
+]
+
+GRAVIDADES = ["", "LEVE", "MEDIA", "GRAVE", "GRAVISSIMA"]
+
+LOTE = 200
+
+
+class _ConsultaSignals(QObject):
+    pronta = Signal(int, object)  # token, ConsultaLog
+    erro = Signal(int, str)
+
+
+class _ConsultaWorker(QRunnable):
+    # filtra/ordena fora da thread da GUI (lê partições e ordena a coluna-chave)
+    def __init__(self, token: int, log_service: LogService, kwargs: dict):
+        super().__init__()
+        self.token = token
+        self.log_service = log_service
+        self.kwargs = kwargs
+        self.signals = _ConsultaSignals()
+
+    def run(self):
+        try:
+            consulta = self.log_service.preparar_consulta(**self.kwargs)
+        except Exception as e:
+            self.signals.erro.emit(self.token, str(e))
+            return
+        self.signals.pronta.emit(self.token, consulta)
+
+
+class HistoricoModel(QAbstractTableModel):
+    """
+    Modelo do histórico: a consulta (filtro + ordenação) é preparada em segundo
+    plano no LogService e as linhas são buscadas em páginas via canFetchMore/fetchMore.
+    """
+    erro = Signal(str)
+    carregado = Signal(int)  # total de registros da consulta
+
+    def __init__(self, log_service: LogService, parent=None):
+        super().__init__(parent)
+        self.log_service = log_service
+        self.filtros: dict | None = None  # None = ainda sem consulta (evita carga no setSortingEnabled)
+        self.ordenar_por = "id_registro"
+        self.decrescente = True
+
+        self._colunas = [c for c, _ in COLUNAS_HISTORICO]
+        self._consulta: ConsultaLog | None = None
+        self._linhas: list[dict] = []
+        self._token = 0
+        self._worker: _ConsultaWorker | None = None
+
+    def recarregar(self):
+        if self.filtros is None:
+            return
+        self._token += 1
+        worker = _ConsultaWorker(
+            self._token, self.log_service,
+            {**self.filtros, "ordenar_por": self.ordenar_por, "decrescente": self.decrescente},
+        )
+        worker.signals.pronta.connect(self._on_pronta, Qt.QueuedConnection)
+        worker.signals.erro.connect(self._on_erro, Qt.QueuedConnection)
+        self._worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_pronta(self, token: int, consulta: ConsultaLog):
+        if token != self._token:
+            return  # resposta de uma consulta antiga
+        self.beginResetModel()
+        self._consulta = consulta
+        self._linhas = []
+        self.endResetModel()
+        self.carregado.emit(consulta.total)
+
+    def _on_erro(self, token: int, msg: str):
+        if token == self._token:
+            self.erro.emit(msg)
+
+    def total(self) -> int:
+        return 0 if self._consulta is None else self._consulta.total
+
+    def linha(self, row: int) -> dict:
+        return self._linhas[row]
+
+    # ---------- QAbstractTableModel
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._colunas)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self._linhas) < self.total()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._consulta is None:
+            return
+        inicio = len(self._linhas)
+        pagina = self._consulta.pagina(inicio, LOTE).to_dict("records")
+        if not pagina:
+            return
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(pagina) - 1)
+        self._linhas.extend(pagina)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return str(self._linhas[index.row()][self._colunas[index.column()]])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUNAS_HISTORICO[section][1]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.ordenar_por = self._colunas[column]
+        self.decrescente = order == Qt.DescendingOrder
+        self.recarregar()
+
+
+class HistoricoDialog(QDialog):
+    def __init__(self, log_service: LogService, on_reabrir, parent=None):
+        """
+        on_reabrir(row: dict): chamado com a linha do log escolhida para gerar o PDF de novo.
+        """
+        super().__init__(parent)
+        self.on_reabrir = on_reabrir
+        self.model = HistoricoModel(log_service, self)
+        self.model.carregado.connect(lambda total: self.lbl_total.setText(f"{total} registro(s)"))
+        self.model.erro.connect(lambda msg: QMessageBox.critical(self, "Erro ao consultar histórico", msg))
+
+        self.setWindowTitle("Histórico de multas processadas")
+        self.setMinimumSize(1100, 600)
+
+        self._build_ui()
+        self.on_filtrar()
+
+    def _build_ui(self):
+        root = QVBoxLayout(self)
+
+        # ===== Filtros
+        row_filtro = QHBoxLayout()
+
+        self.ed_motorista = QLineEdit()
+        self.ed_motorista.setPlaceholderText("Motorista")
+        self.ed_placa = QLineEdit()
+        self.ed_placa.setPlaceholderText("Placa")
+        self.ed_placa.setMaximumWidth(120)
+
+        self.cb_gravidade = QComboBox()
+        for g in GRAVIDADES:
+            self.cb_gravidade.addItem(g or "Todas")
+
+        self.ck_periodo = QCheckBox("Período")
+        hoje = QDate.currentDate()
+        self.dt_inicio = QDateEdit(hoje.addMonths(-3))
+        self.dt_fim = QDateEdit(hoje)
+        for dt in (self.dt_inicio, self.dt_fim):
+            dt.setCalendarPopup(True)
+            dt.setDisplayFormat("dd/MM/yyyy")
+
+        btn_filtrar = QPushButton("Filtrar")
+        btn_filtrar.clicked.connect(self.on_filtrar)
+        self.ed_motorista.returnPressed.connect(self.on_filtrar)
+        self.ed_placa.returnPressed.connect(self.on_filtrar)
+
+        row_filtro.addWidget(self.ed_motorista, 1)
+        row_filtro.addWidget(self.ed_placa)
+        row_filtro.addWidget(self.cb_gravidade)
+        row_filtro.addWidget(self.ck_periodo)
+        row_filtro.addWidget(self.dt_inicio)
+        row_filtro.addWidget(QLabel("até"))
+        row_filtro.addWidget(self.dt_fim)
+        row_filtro.addWidget(btn_filtrar)
+        root.addLayout(row_filtro)
+
+        # ===== Tabela
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.DescendingOrder)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(lambda _: self.on_reabrir_click())
+        root.addWidget(self.table, 1)
+
+        # ===== Rodapé
+        row_btn = QHBoxLayout()
+        self.lbl_total = QLabel("")
+        self.lbl_total.setStyleSheet("color: #555;")
+        btn_reabrir = QPushButton("Reabrir (gerar PDF novamente)")
+        btn_reabrir.clicked.connect(self.on_reabrir_click)
+        row_btn.addWidget(self.lbl_total, 1)
+        row_btn.addWidget(btn_reabrir)
+        root.addLayout(row_btn)
+
+    def on_filtrar(self):
+        filtros = {
+            "motorista": self.ed_motorista.text(),
+            "placa": self.ed_placa.text(),
+            "gravidade": GRAVIDADES[self.cb_gravidade.currentIndex()],
+        }
+        if self.ck_periodo.isChecked():
+            filtros["inicio"] = self.dt_inicio.date().toString("yyyy-MM-dd")
+            filtros["fim"] = self.dt_fim.date().toString("yyyy-MM-dd")
+
+        self.lbl_total.setText("Consultando...")
+        self.model.filtros = filtros
+        self.model.recarregar()
+
+    def on_reabrir_click(self):
+        sel = self.table.selectionModel().selectedRows()
+        if not sel:
+            QMessageBox.warning(self, "Atenção", "Selecione um registro do histórico.")
+            return
+        self.on_reabrir(self.model.linha(sel[0].row()))
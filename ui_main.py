@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from datetime import datetime
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QPixmap
@@ -12,8 +13,12 @@ from PySide6.QtWidgets import (
 from utils.helpers import resource_path, ensure_dirs, sanitize_filename, get_persistent_app_dir
 from services.pdf_service import extrair_campos_notificacao, codigo_pdf_para_cod_multa
 from services.multa_service import MultaService
-from services.doc_service import gerar_pdf_final
+from services.doc_service import gerar_pdf_final, remontar_pdf_final, caminho_livre
 from services.log_service import LogService
+from services.archive_service import ArquivoService
+from services.motorista_import_service import importar_motoristas, caminho_motoristas
+from ui_historico import HistoricoDialog
+from ui_preview import ThumbStrip
 
 
 class MainWindow(QMainWindow):
@@ -30,10 +35,13 @@ class MainWindow(QMainWindow):
             app_name="AppMultas",
         )
 
-        self.MOTORISTAS_CSV = str(self.DATA_DIR / "motoristas.csv")
+        # cadastro importado fica no APP_DIR (data/ pode ser só leitura no .exe)
+        self.MOTORISTAS_CSV = caminho_motoristas(str(self.APP_DIR), str(self.DATA_DIR))
         self.TIPOS_MULTA_CSV = str(self.DATA_DIR / "tipos_multa.csv")
         self.TERMO_TEMPLATE_DOCX = str(self.TEMPLATES_DIR / "termo_multa_modelo.docx")
         self.LOG_CSV_PATH = str(self.APP_DIR / "logs_multas.csv")
+        self.LAYOUTS_JSON_PATH = str(self.APP_DIR / "layouts_notificacao.json")
+        self.ARQUIVO_DIR = str(self.APP_DIR / "arquivo")
 
         ensure_dirs([self.DATA_DIR, self.TEMPLATES_DIR, self.OUTPUT_DIR, self.ASSETS_DIR])
 
@@ -44,8 +52,11 @@ class MainWindow(QMainWindow):
 
         # ====== Services
         try:
-            self.multa_service = MultaService(self.MOTORISTAS_CSV, self.TIPOS_MULTA_CSV)
+            self.multa_service = MultaService(
+                self.MOTORISTAS_CSV, self.TIPOS_MULTA_CSV, cache_dir=str(self.APP_DIR)
+            )
             self.log_service = LogService(self.LOG_CSV_PATH)
+            self.arquivo_service = ArquivoService(self.ARQUIVO_DIR, comprimir=True)
         except Exception as e:
             QMessageBox.critical(self, "Erro ao iniciar", str(e))
             raise
@@ -130,8 +141,13 @@ class MainWindow(QMainWindow):
         gb_motor = QGroupBox("2) Motorista")
         lay_motor = QVBoxLayout(gb_motor)
 
+        row_motor = QHBoxLayout()
         self.cb_motorista = QComboBox()
-        lay_motor.addWidget(self.cb_motorista)
+        btn_import = QPushButton("Atualizar cadastro")
+        btn_import.clicked.connect(self.on_importar_motoristas)
+        row_motor.addWidget(self.cb_motorista, 1)
+        row_motor.addWidget(btn_import)
+        lay_motor.addLayout(row_motor)
 
         root.addWidget(gb_motor)
 
@@ -154,16 +170,25 @@ class MainWindow(QMainWindow):
 
         # ===== Preview
         gb_prev = QGroupBox("Prévia dos dados extraídos + multa encontrada")
-        lay_prev = QVBoxLayout(gb_prev)
+        lay_prev = QHBoxLayout(gb_prev)
         self.txt_preview = QTextEdit()
         self.txt_preview.setReadOnly(True)
         self.txt_preview.setPlaceholderText("Selecione um PDF para extrair automaticamente os campos.")
-        lay_prev.addWidget(self.txt_preview)
+        lay_prev.addWidget(self.txt_preview, 1)
+
+        # miniaturas das primeiras páginas (render em segundo plano)
+        self.thumbs = ThumbStrip(str(self.APP_DIR / "miniaturas"))
+        lay_prev.addWidget(self.thumbs)
         root.addWidget(gb_prev, 1)
 
         # ===== Botões
         row_btn = QHBoxLayout()
 
+        self.btn_hist = QPushButton("Histórico")
+        self.btn_hist.setMinimumHeight(40)
+        self.btn_hist.clicked.connect(self.on_historico)
+        row_btn.addWidget(self.btn_hist)
+
         row_btn.addStretch(1)
         
         self.btn_msg = QPushButton("Gerar Mensagem")
@@ -209,9 +234,10 @@ class MainWindow(QMainWindow):
 
         self.pdf_path = path
         self.lbl_pdf.setText(path)
+        self.thumbs.mostrar(path)
 
         try:
-            self.extracao = extrair_campos_notificacao(path)
+            self.extracao = extrair_campos_notificacao(path, layouts_path=self.LAYOUTS_JSON_PATH)
 
             cod_multa = codigo_pdf_para_cod_multa(self.extracao["codigo_4d"], self.extracao["desdobramento"])
             self.multa_atual = self.multa_service.buscar_multa_por_cod(cod_multa)
@@ -318,6 +344,9 @@ class MainWindow(QMainWindow):
                 motorista_nome=motorista_nome,
                 indicar=indicar,
                 output_dir=str(downloads_dir),  # ✅ Downloads
+                cache_dir=str(self.APP_DIR),
+                tipos_multa_csv=self.TIPOS_MULTA_CSV,
+                arquivo=self.arquivo_service,
             )
 
             # registra log SOMENTE aqui
@@ -334,4 +363,132 @@ class MainWindow(QMainWindow):
                 pass
 
         except Exception as e:
-            QMessageBox.critical(self, "Erro ao gerar PDF", str(e))
\ No newline at end of file
+            QMessageBox.critical(self, "Erro ao gerar PDF", str(e))
+
+    def on_historico(self):
+        dlg = HistoricoDialog(self.log_service, self.on_reabrir_registro, self)
+        dlg.exec()
+        dlg.deleteLater()  # solta o modelo e a consulta (frames das partições)
+
+    def on_reabrir_registro(self, row: dict):
+        """
+        Gera de novo o PDF final de um registro do histórico (NÃO registra log).
+        Se o registro tem termo/notificação no arquivo, só remonta o PDF;
+        senão refaz o termo com os valores gravados no log.
+        """
+        if self.arquivo_service.existe(row.get("chave_termo")) and \
+                self.arquivo_service.existe(row.get("chave_notificacao")):
+            try:
+                downloads_dir = Path.home() / "Downloads"
+                data_nome = datetime.strptime(row["data_multa"], "%Y-%m-%d").strftime("%d-%m-%Y")
+                final_name = f"Autorização Desconto {sanitize_filename(row['nome_motorista'])} {data_nome}.pdf"
+                final_path = remontar_pdf_final(
+                    self.arquivo_service, row["chave_termo"], row["chave_notificacao"],
+                    caminho_livre(str(downloads_dir), final_name, row["id_registro"]),
+                )
+                QMessageBox.information(self, "OK", f"PDF final recuperado do arquivo em:\n{final_path}")
+                self.lbl_status.setText(f"Registro {row['id_registro']} reaberto do arquivo (sem novo log).")
+            except Exception as e:
+                QMessageBox.critical(self, "Erro ao reabrir registro", str(e))
+            return
+
+        if not os.path.exists(self.TERMO_TEMPLATE_DOCX):
+            QMessageBox.critical(self, "Template ausente", f"Template não encontrado:\n{self.TERMO_TEMPLATE_DOCX}")
+            return
+
+        pdf_notificacao, _ = QFileDialog.getOpenFileName(
+            self, f"Notificação original do registro {row['id_registro']} (PDF)", "", "PDF (*.pdf)"
+        )
+        if not pdf_notificacao:
+            return
+
+        try:
+            data_multa = datetime.strptime(row["data_multa"], "%Y-%m-%d").strftime("%d/%m/%Y")
+            extracao = {
+                "placa": row["placa"],
+                "data_multa": data_multa,
+                "hora_multa": row["hora_multa"],
+                "cidade": row["cidade"],
+                "uf": row["uf"],
+            }
+            multa_atual = {
+                "codigo_multa": row["codigo_multa"],
+                "descricao_multa": row["descricao_multa"],
+                "valor_base_num": float(row["valor_base"]),
+                "pontos": int(float(row["pontos"])),
+                "gravidade_multa": row["gravidade_multa"],
+            }
+
+            downloads_dir = Path.home() / "Downloads"
+            downloads_dir.mkdir(parents=True, exist_ok=True)
+
+            result = gerar_pdf_final(
+                motoristas_csv=self.MOTORISTAS_CSV,
+                template_docx=self.TERMO_TEMPLATE_DOCX,
+                pdf_notificacao=pdf_notificacao,
+                extracao=extracao,
+                multa_atual=multa_atual,
+                motorista_nome=row["nome_motorista"],
+                indicar=row["decisao_indicar"],
+                output_dir=str(downloads_dir),
+                cache_dir=str(self.APP_DIR),
+                tipos_multa_csv=self.TIPOS_MULTA_CSV,
+                registro=row,
+            )
+
+            QMessageBox.information(self, "OK", f"PDF final gerado novamente em:\n{result['pdf_final_path']}")
+            self.lbl_status.setText(f"Registro {row['id_registro']} reaberto (sem novo log).")
+
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao reabrir registro", str(e))
+
+    def on_importar_motoristas(self):
+        """
+        Valida um novo motoristas.csv (CPF, telefone, duplicados) e, sem erros,
+        grava o cadastro em APP_DIR/motoristas.csv e recarrega a lista.
+        Com erros, o usuário pode importar mesmo assim.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Novo cadastro de motoristas (CSV)", "", "CSV (*.csv)")
+        if not path:
+            return
+
+        destino = str(self.APP_DIR / "motoristas.csv")
+        relatorio_csv = str(self.APP_DIR / "relatorio_motoristas.csv")
+        try:
+            res = importar_motoristas(path, destino, relatorio_csv=relatorio_csv)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao importar motoristas", str(e))
+            return
+
+        resumo = (
+            f"Linhas: {res['linhas']}\n"
+            f"Erros: {res['erros']}\n"
+            f"Avisos: {res['avisos']}\n\n"
+            f"Relatório:\n{relatorio_csv}"
+        )
+        if not res["importado"]:
+            box = QMessageBox(QMessageBox.Warning, "Cadastro NÃO atualizado",
+                              "Corrija os erros e importe de novo.\n\n" + resumo, parent=self)
+            btn_forcar = box.addButton("Importar mesmo assim", QMessageBox.DestructiveRole)
+            box.addButton(QMessageBox.Cancel)
+            box.exec()
+            if box.clickedButton() is not btn_forcar:
+                return
+            try:
+                res = importar_motoristas(path, destino, relatorio_csv=relatorio_csv, forcar=True)
+            except Exception as e:
+                QMessageBox.critical(self, "Erro ao importar motoristas", str(e))
+                return
+
+        self.MOTORISTAS_CSV = destino
+        try:
+            self.multa_service = MultaService(
+                self.MOTORISTAS_CSV, self.TIPOS_MULTA_CSV, cache_dir=str(self.APP_DIR)
+            )
+            self._load_motoristas()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao recarregar motoristas", str(e))
+            return
+
+        QMessageBox.information(self, "OK", "Cadastro de motoristas atualizado.\n\n" + resumo)
+        self.lbl_status.setText("Cadastro de motoristas atualizado.")
@@ -0,0 +1,239 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, Signal
+from PySide6.QtGui import QImage, QPixmap, QIcon
+from PySide6.QtPdf import QPdfDocument
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QListView
+
+from utils.helpers import sha256_arquivo
+
+MAX_PAGINAS = 3
+LARGURAS = (90, 260)  # 1ª passada rápida em baixa resolução, depois a definitiva
+
+
+class ThumbCache:
+    """
+    Cache LRU de miniaturas, chave = (sha256 do PDF, página, largura).
+    Memória limitada por bytes; disco (PNG) limitado por bytes, removendo
+    os arquivos menos usados (mtime) quando passa do limite.
+    """
+
+    def __init__(self, disk_dir: str, mem_max_bytes: int = 64 * 1024 * 1024,
+                 disk_max_bytes: int = 256 * 1024 * 1024):
+        self.disk_dir = disk_dir
+        self.mem_max_bytes = mem_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        os.makedirs(disk_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._mem: OrderedDict[tuple, QImage] = OrderedDict()
+        self._mem_bytes = 0
+
+        self._disk: dict[str, int] = {}
+        for name in os.listdir(disk_dir):
+            if name.endswith(".png"):
+                self._disk[name] = os.path.getsize(os.path.join(disk_dir, name))
+        self._disk_bytes = sum(self._disk.values())
+
+    def _arquivo(self, key: tuple) -> str:
+        sha, pagina, largura = key
+        return f"{sha}_{pagina}_{largura}.png"
+
+    def get(self, key: tuple) -> QImage | None:
+        with self._lock:
+            img = self._mem.get(key)
+            if img is not None:
+                self._mem.move_to_end(key)
+                return img
+
+        name = self._arquivo(key)
+        path = os.path.join(self.disk_dir, name)
+        if name not in self._disk:
+            return None
+        img = QImage(path)
+        if img.isNull():
+            return None
+        try:
+            os.utime(path)  # marca como usado recentemente
+        except OSError:
+            pass
+        self._put_mem(key, img)
+        return img
+
+    def put(self, key: tuple, img: QImage):
+        self._put_mem(key, img)
+
+        name = self._arquivo(key)
+        path = os.path.join(self.disk_dir, name)
+        if img.save(path, "PNG"):
+            with self._lock:
+                self._disk_bytes += os.path.getsize(path) - self._disk.get(name, 0)
+                self._disk[name] = os.path.getsize(path)
+            self._evict_disk()
+
+    def _put_mem(self, key: tuple, img: QImage):
+        with self._lock:
+            if key in self._mem:
+                self._mem_bytes -= self._mem.pop(key).sizeInBytes()
+            self._mem[key] = img
+            self._mem_bytes += img.sizeInBytes()
+            while self._mem_bytes > self.mem_max_bytes and len(self._mem) > 1:
+                _, old = self._mem.popitem(last=False)
+                self._mem_bytes -= old.sizeInBytes()
+
+    def _evict_disk(self):
+        with self._lock:
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            por_uso = []
+            for name in self._disk:
+                try:
+                    por_uso.append((os.path.getmtime(os.path.join(self.disk_dir, name)), name))
+                except OSError:
+                    por_uso.append((0, name))
+            for _, name in sorted(por_uso):
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.disk_dir, name))
+                except OSError:
+                    pass
+                self._disk_bytes -= self._disk.pop(name)
+
+
+class _RenderSignals(QObject):
+    pagina = Signal(int, int, int, QImage)  # token, página, largura, imagem
+    hash = Signal(int, object, str)         # token, (path, tamanho, mtime), sha256
+    erro = Signal(int, str)
+
+
+class _RenderWorker(QRunnable):
+    def __init__(self, token: int, pdf_path: str, hashes: dict, cache: ThumbCache):
+        """
+        hashes: memo (path, tamanho, mtime) -> sha256 do ThumbStrip; aqui só é lido,
+        o hash novo volta pelo sinal e a GUI guarda.
+        """
+        super().__init__()
+        self.token = token
+        self.pdf_path = pdf_path
+        self.hashes = hashes
+        self.cache = cache
+        self.cancelado = False
+        self.sha = None
+        self.signals = _RenderSignals()
+
+    def _sha256(self) -> str | None:
+        # mesmo arquivo (tamanho+mtime) não é re-hasheado ao voltar para ele
+        st = os.stat(self.pdf_path)
+        key = (self.pdf_path, st.st_size, st.st_mtime_ns)
+        sha = self.hashes.get(key)
+        if sha is not None:
+            return sha
+        sha = sha256_arquivo(self.pdf_path, cancelado=lambda: self.cancelado)
+        if sha is None:
+            return None
+        self.signals.hash.emit(self.token, key, sha)
+        return sha
+
+    def run(self):
+        try:
+            self.sha = self._sha256()
+        except OSError:
+            return  # arquivo sumiu/sem acesso: fica sem prévia
+        if self.sha is None:
+            return  # cancelado durante o hash
+
+        doc = None
+        try:
+            for largura in LARGURAS:
+                for pagina in range(MAX_PAGINAS):
+                    if self.cancelado:
+                        return
+                    key = (self.sha, pagina, largura)
+                    img = self.cache.get(key)
+                    if img is None:
+                        if doc is None:
+                            doc = QPdfDocument()
+                            doc.load(self.pdf_path)
+                            if doc.status() != QPdfDocument.Status.Ready:
+                                raise RuntimeError("Não consegui abrir o PDF para a prévia.")
+                        if pagina >= doc.pageCount():
+                            break
+                        pt = doc.pagePointSize(pagina)
+                        altura = round(largura * pt.height() / pt.width()) if pt.width() else largura
+                        img = doc.render(pagina, QSize(largura, altura))
+                        if img.isNull():
+                            continue
+                        self.cache.put(key, img)
+                    self.signals.pagina.emit(self.token, pagina, largura, img)
+        except Exception as e:
+            self.signals.erro.emit(self.token, str(e))
+        finally:
+            if doc is not None:
+                doc.close()
+
+
+class ThumbStrip(QListWidget):
+    """
+    Faixa de miniaturas das primeiras páginas da notificação.
+    O render roda no QThreadPool; a GUI só recebe as imagens prontas.
+    """
+
+    def __init__(self, cache_dir: str, parent=None):
+        super().__init__(parent)
+        self.cache = ThumbCache(cache_dir)
+        self.pool = QThreadPool.globalInstance()
+
+        self._token = 0
+        self._worker: _RenderWorker | None = None
+        self._hashes: dict[tuple, str] = {}
+
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.TopToBottom)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        self.setIconSize(QSize(LARGURAS[-1], round(LARGURAS[-1] * 1.42)))
+        self.setSpacing(6)
+        self.setFixedWidth(LARGURAS[-1] + 40)
+
+    def limpar(self):
+        self._token += 1
+        if self._worker is not None:
+            self._worker.cancelado = True
+            self._worker = None
+        self.clear()
+
+    def mostrar(self, pdf_path: str):
+        self.limpar()
+        worker = _RenderWorker(self._token, pdf_path, self._hashes, self.cache)
+        worker.signals.pagina.connect(self._on_pagina, Qt.QueuedConnection)
+        worker.signals.hash.connect(self._on_hash, Qt.QueuedConnection)
+        worker.signals.erro.connect(self._on_erro, Qt.QueuedConnection)
+        self._worker = worker
+        self.pool.start(worker)
+
+    def _on_hash(self, token: int, key: tuple, sha: str):
+        # vale mesmo se o PDF já foi trocado: serve para quando voltar a ele
+        self._hashes[key] = sha
+
+    def _on_pagina(self, token: int, pagina: int, largura: int, img: QImage):
+        if token != self._token:
+            return  # resultado de um PDF anterior
+        while self.count() <= pagina:
+            self.addItem(QListWidgetItem(f"Pág. {self.count() + 1}"))
+        item = self.item(pagina)
+        # não troca uma miniatura boa por uma de resolução menor
+        if (item.data(Qt.UserRole) or 0) > largura:
+            return
+        item.setData(Qt.UserRole, largura)
+        pix = QPixmap.fromImage(img)
+        if largura < LARGURAS[-1]:
+            pix = pix.scaledToWidth(LARGURAS[-1], Qt.FastTransformation)
+        item.setIcon(QIcon(pix))
+
+    def _on_erro(self, token: int, msg: str):
+        if token == self._token:
+            self.clear()
+            self.addItem(QListWidgetItem(msg))
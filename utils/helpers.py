@@ -1,9 +1,27 @@
 import os
 import re
 import sys
+import time
+import hashlib
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
+HASH_CHUNK = 1024 * 1024
+
+def sha256_arquivo(path: str, cancelado=None) -> str | None:
+    """
+    SHA-256 do arquivo lido em blocos de 1 MB (não carrega tudo na memória).
+    cancelado: função opcional checada a cada bloco; se der True, devolve None.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            if cancelado is not None and cancelado():
+                return None
+            h.update(chunk)
+    return h.hexdigest()
+
 def resource_path(relative_path: str) -> str:
     base = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
     # __file__ aqui é ...\utils\helpers.py, então precisamos subir 1 nível no modo .py
@@ -62,4 +80,37 @@ def get_persistent_app_dir(app_name="AppMultas"):
         / app_name
     )
     base.mkdir(parents=True, exist_ok=True)
-    return base
\ No newline at end of file
+    return base
+
+TRAVA_EXPIRADA_SEGUNDOS = 60  # trava mais velha que isso é de um processo que morreu
+
+@contextmanager
+def trava_arquivo(lock_path: str, timeout: float = 15.0):
+    """
+    Trava entre processos (app + API gravam os mesmos arquivos): arquivo criado
+    com O_EXCL; trava abandonada por processo morto é removida.
+    """
+    inicio = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > TRAVA_EXPIRADA_SEGUNDOS:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() - inicio > timeout:
+                raise RuntimeError(f"Arquivo em uso por outro processo (trava: {lock_path})")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass